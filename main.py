@@ -4,64 +4,92 @@
 # dependencies = [
 #     "rich",
 #     "requests",
+#     "orjson",
 # ]
 # ///
 import os
 import sys
+import io
 import json
 import hashlib
-import requests
-import tarfile
 import shutil
-import platform
-import concurrent.futures
+import subprocess
 import argparse
 import tempfile
 import time
+import threading
 import sqlite3
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
+from functools import cache, partial
+from collections import deque
 from datetime import datetime, timedelta
-import fcntl
-from functools import lru_cache
 from rich.console import Console
 from rich.table import Table
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TransferSpeedColumn
 from rich.panel import Panel
 from rich import box
 from rich.prompt import Confirm
 
+# orjson is much faster on large formula payloads; stdlib json keeps things working without it
+try:
+    import orjson
+    
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode()
+
 VERSION = "0.0.12-alpha"
 BASE_DIR = Path.home() / ".br"
 CELLAR = BASE_DIR / "Cellar"
 BIN_DIR = BASE_DIR / "bin"
 CACHE_DIR = BASE_DIR / "cache"
 INVENTORY_FILE = BASE_DIR / "inventory.json"
+INVENTORY_DB = BASE_DIR / "inventory.db"
 CACHE_DB = CACHE_DIR / "metadata.db"
 CONFIG_FILE = BASE_DIR / "config.json"
+FLAVOR_CACHE_FILE = BASE_DIR / ".flavor"
 UPDATE_CHECK_FILE = CACHE_DIR / "last_update_check"
 MAX_PARALLEL_DOWNLOADS = 5
+MAX_METADATA_WORKERS = 16
 CACHE_TTL_HOURS = 6  
+CACHE_SCHEMA_VERSION = 7
 UPDATE_CHECK_INTERVAL_HOURS = 24  
+FLAVOR_CACHE_TTL_SECONDS = 86400
 GITHUB_REPO = "SamukeloGift/Brewery" 
+BULK_INDEX_URL = "https://formulae.brew.sh/api/formula.json"
+BULK_INDEX_KEY = "formula"
+METADATA_TABLE = "metadata_cache"
+INDEX_TABLE = "formula_index"
 HEADERS = {"User-Agent": "BrPackageManager/0.2"}
 REQUEST_TIMEOUT = 15
 RETRY_ATTEMPTS = 3
 RETRY_DELAY = 2
+PROGRESS_UPDATE_BYTES = 256 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+EXTRACT_DIR_PREFIX = ".extract-"
 
 OS_MAP: dict[str, str] = {
     "26": "tahoe", "15": "sequoia", "14": "sonoma", "13": "ventura",
     "12": "monterey", "11": "big_sur", "10.15": "catalina"
 }
 
+@cache
 def get_os_flavor() -> str:
+    # Imported here so runs that hit the flavor cache never load platform
+    import platform
     system = platform.system().lower()
     machine = platform.machine().lower()
     if system == "linux": return "x86_64_linux"
     elif system == "darwin":
-        mac_ver = platform.mac_ver()[0].split(".")[0]
+        parts = platform.mac_ver()[0].split(".")
+        # Up to Catalina the release is identified by the minor version (10.15)
+        mac_ver = ".".join(parts[:2]) if parts[0] == "10" else parts[0]
         arch = "arm64" if machine == "arm64" else "x86_64"
-        name = OS_MAP.get(mac_ver, "ventura")
+        name = OS_MAP.get(mac_ver, "sonoma")
         return f"{arch}_{name}"
     else:
         raise OSError("Unsupported Operating System")
@@ -95,7 +123,78 @@ def compare_versions(v1: str, v2: str) -> int:
             return 1
         return 0
 
-OS_FLAVOR = get_os_flavor()
+def remove_tree(path: Path) -> int:
+    """Delete a directory tree and return the number of bytes its files occupied."""
+    total = 0
+    pending = [path]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    # d_type from readdir tells directories apart without a stat call
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(path, ignore_errors=True)
+    return total
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this PID still exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+def dependency_order(res_map: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Order resolved packages so every package comes after its dependencies."""
+    order = []
+    visited = set()
+    for root in res_map:
+        if root in visited:
+            continue
+        visited.add(root)
+        # Explicit stack of (package, remaining deps) gives a post-order walk without recursion
+        stack = [(root, iter(res_map[root]['dependencies']))]
+        while stack:
+            name, deps = stack[-1]
+            for dep in deps:
+                if dep not in visited and dep in res_map:
+                    visited.add(dep)
+                    stack.append((dep, iter(res_map[dep]['dependencies'])))
+                    break
+            else:
+                stack.pop()
+                order.append(name)
+    return order
+
+def load_os_flavor() -> str:
+    """Return the bottle flavor, reusing the answer saved by a recent run."""
+    try:
+        if time.time() - FLAVOR_CACHE_FILE.stat().st_mtime < FLAVOR_CACHE_TTL_SECONDS:
+            flavor = FLAVOR_CACHE_FILE.read_text().strip()
+            if flavor:
+                return flavor
+    except OSError:
+        pass
+    
+    flavor = get_os_flavor()
+    try:
+        BASE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = FLAVOR_CACHE_FILE.with_name(f"{FLAVOR_CACHE_FILE.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(flavor)
+        os.replace(tmp_path, FLAVOR_CACHE_FILE)
+    except OSError:
+        pass
+    return flavor
+
+OS_FLAVOR = load_os_flavor()
 
 
 class MetadataCache:
@@ -104,94 +203,263 @@ class MetadataCache:
     def __init__(self, db_path: Path):
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # One long-lived connection shared by all threads; the lock keeps statements from interleaving
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
         self._init_db()
     
     def _init_db(self):
         """Initialize the cache database."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("PRAGMA temp_store = MEMORY")
+            self._conn.execute("PRAGMA cache_size = -64000")
+            self._conn.execute("PRAGMA mmap_size = 268435456")
+            
+            # The cache is disposable, so an outdated layout is simply rebuilt
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS metadata_cache")
+                self._conn.execute("DROP TABLE IF EXISTS formula_index")
+                self._conn.execute("DROP TABLE IF EXISTS resolution_cache")
+                self._conn.execute(f"PRAGMA user_version = {CACHE_SCHEMA_VERSION}")
+            self._conn.execute("""
                 CREATE TABLE IF NOT EXISTS metadata_cache (
                     package_name TEXT PRIMARY KEY,
-                    data TEXT NOT NULL,
-                    cached_at REAL NOT NULL,
-                    ttl_hours INTEGER NOT NULL
-                )
+                    data BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_expires_at 
+                ON metadata_cache(expires_at)
+            """)
+            # The whole-catalogue index lives apart so it never counts or resolves as a package
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS formula_index (
+                    package_name TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                ) WITHOUT ROWID
             """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_cached_at 
-                ON metadata_cache(cached_at)
+            # Dependency graphs resolved for a set of requested packages
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS resolution_cache (
+                    root_key TEXT PRIMARY KEY,
+                    resolved BLOB NOT NULL,
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID
             """)
-            conn.commit()
     
-    def get(self, package_name: str) -> Optional[Dict[str, Any]]:
+    def get(self, package_name: str, table: str = METADATA_TABLE) -> Optional[Dict[str, Any]]:
         """Retrieve cached metadata if still valid."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT data, cached_at, ttl_hours 
-                FROM metadata_cache 
+        with self._lock:
+            # Expired rows are kept so they can be revalidated; cleanup removes them
+            cursor = self._conn.execute(f"""
+                SELECT data 
+                FROM {table} 
+                WHERE package_name = ? AND expires_at > ?
+            """, (package_name, time.time()))
+            row = cursor.fetchone()
+        
+        # Parse outside the lock so other threads aren't held up by large entries
+        return json_loads(row[0]) if row else None
+    
+    def get_stale(self, package_name: str, table: str = METADATA_TABLE) -> Optional[Tuple[Dict[str, Any], Optional[str], Optional[str]]]:
+        """Retrieve cached metadata regardless of age, with its ETag and Last-Modified validators."""
+        with self._lock:
+            cursor = self._conn.execute(f"""
+                SELECT data, etag, last_modified 
+                FROM {table} 
                 WHERE package_name = ?
             """, (package_name,))
             row = cursor.fetchone()
-            
-            if row:
-                data, cached_at, ttl_hours = row
-                age_hours = (time.time() - cached_at) / 3600
-                
-                if age_hours < ttl_hours:
-                    return json.loads(data)
-                else:
-                    # Expired, delete it
-                    conn.execute("DELETE FROM metadata_cache WHERE package_name = ?", (package_name,))
-                    conn.commit()
+        
+        if row:
+            data, etag, last_modified = row
+            return json_loads(data), etag, last_modified
         
         return None
     
-    def set(self, package_name: str, data: Dict[str, Any], ttl_hours: int = CACHE_TTL_HOURS):
-        """Store metadata in cache."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO metadata_cache (package_name, data, cached_at, ttl_hours)
-                VALUES (?, ?, ?, ?)
-            """, (package_name, json.dumps(data), time.time(), ttl_hours))
-            conn.commit()
+    def set_raw(self, package_name: str, payload: bytes, ttl_hours: int = CACHE_TTL_HOURS,
+                etag: Optional[str] = None, last_modified: Optional[str] = None, table: str = METADATA_TABLE):
+        """Store an already serialized JSON response body as-is."""
+        with self._lock:
+            self._conn.execute(f"""
+                INSERT OR REPLACE INTO {table} (package_name, data, expires_at, etag, last_modified)
+                VALUES (?, ?, ?, ?, ?)
+            """, (package_name, payload, time.time() + ttl_hours * 3600, etag, last_modified))
+    
+    def get_resolution(self, root_key: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Retrieve a previously resolved dependency graph if still valid."""
+        with self._lock:
+            cursor = self._conn.execute("""
+                SELECT resolved 
+                FROM resolution_cache 
+                WHERE root_key = ? AND expires_at > ?
+            """, (root_key, time.time()))
+            row = cursor.fetchone()
+        
+        return json_loads(row[0]) if row else None
+    
+    def set_resolution(self, root_key: str, resolved: Dict[str, Dict[str, Any]], ttl_hours: int = CACHE_TTL_HOURS):
+        """Store a resolved dependency graph."""
+        payload = json_dumps(resolved)
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO resolution_cache (root_key, resolved, expires_at)
+                VALUES (?, ?, ?)
+            """, (root_key, payload, time.time() + ttl_hours * 3600))
+    
+    def touch(self, package_name: str, ttl_hours: int = CACHE_TTL_HOURS, table: str = METADATA_TABLE):
+        """Restart the TTL of an entry that the server confirmed is unchanged."""
+        with self._lock:
+            self._conn.execute(f"UPDATE {table} SET expires_at = ? WHERE package_name = ?", 
+                        (time.time() + ttl_hours * 3600, package_name))
     
     def invalidate(self, package_name: str):
         """Remove a package from cache."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM metadata_cache WHERE package_name = ?", (package_name,))
-            conn.commit()
+        with self._lock:
+            self._conn.execute("DELETE FROM metadata_cache WHERE package_name = ?", (package_name,))
     
-    def clear_expired(self):
+    def clear_expired(self) -> int:
         """Remove all expired cache entries."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT package_name, cached_at, ttl_hours FROM metadata_cache")
+        with self._lock:
             now = time.time()
-            expired = []
-            
-            for pkg_name, cached_at, ttl_hours in cursor.fetchall():
-                if (now - cached_at) / 3600 >= ttl_hours:
-                    expired.append(pkg_name)
-            
-            if expired:
-                conn.executemany("DELETE FROM metadata_cache WHERE package_name = ?", 
-                                [(pkg,) for pkg in expired])
-                conn.commit()
-            
-            return len(expired)
+            removed = self._conn.execute("DELETE FROM metadata_cache WHERE expires_at <= ?", (now,)).rowcount
+            removed += self._conn.execute("DELETE FROM resolution_cache WHERE expires_at <= ?", (now,)).rowcount
+            return removed
     
     def stats(self) -> Dict[str, int]:
         """Get cache statistics."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT COUNT(*) FROM metadata_cache")
-            total = cursor.fetchone()[0]
-            
-            # Count expired
-            cursor = conn.execute("SELECT cached_at, ttl_hours FROM metadata_cache")
-            now = time.time()
-            expired = sum(1 for cached_at, ttl in cursor.fetchall() 
-                         if (now - cached_at) / 3600 >= ttl)
+        with self._lock:
+            cursor = self._conn.execute("""
+                SELECT COUNT(*), COALESCE(SUM(expires_at <= ?), 0) 
+                FROM metadata_cache
+            """, (time.time(),))
+            total, expired = cursor.fetchone()
             
             return {"total": total, "valid": total - expired, "expired": expired}
+    
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class InventoryStore:
+    """SQLite-backed record of installed packages, updated one row at a time."""
+    
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._init_db()
+    
+    def _init_db(self):
+        """Initialize the inventory database."""
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS inventory (
+                    name TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    symlinks BLOB NOT NULL
+                ) WITHOUT ROWID
+            """)
+    
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Read every installed package into a dict keyed by name."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, version, path, symlinks FROM inventory").fetchall()
+        return {
+            name: {"version": version, "path": path, "symlinks": json_loads(symlinks)}
+            for name, version, path, symlinks in rows
+        }
+    
+    def save(self, name: str, entry: Dict[str, Any]):
+        """Insert or update a single package."""
+        with self._lock:
+            self._conn.execute("""
+                INSERT OR REPLACE INTO inventory (name, version, path, symlinks)
+                VALUES (?, ?, ?, ?)
+            """, (name, entry['version'], entry['path'], json_dumps(entry['symlinks'])))
+    
+    def remove(self, name: str):
+        """Delete a single package."""
+        with self._lock:
+            self._conn.execute("DELETE FROM inventory WHERE name = ?", (name,))
+    
+    def import_json(self, json_path: Path):
+        """One-time migration from the old inventory.json file."""
+        try:
+            entries = json_loads(json_path.read_bytes())
+        except json.JSONDecodeError:
+            entries = {}
+        
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("""
+                    INSERT OR REPLACE INTO inventory (name, version, path, symlinks)
+                    VALUES (?, ?, ?, ?)
+                """, [(name, e['version'], e['path'], json_dumps(e.get('symlinks', []))) 
+                      for name, e in entries.items()])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        # Keep the old file around rather than deleting user data outright
+        json_path.rename(json_path.with_suffix('.json.bak'))
+
+
+class HashingStream(io.RawIOBase):
+    """Read-only file object over a chunk iterator that SHA256-hashes bytes as they are consumed."""
+    
+    def __init__(self, chunks, on_read=None):
+        self._chunks = iter(chunks)
+        self._on_read = on_read
+        self._buffer = b""
+        self._offset = 0
+        self._sha256 = hashlib.sha256()
+    
+    def readable(self) -> bool:
+        return True
+    
+    def _next_chunk(self) -> bool:
+        """Pull the next non-empty chunk into the buffer; False once the source is exhausted."""
+        for chunk in self._chunks:
+            if chunk:
+                self._sha256.update(chunk)
+                if self._on_read:
+                    self._on_read(len(chunk))
+                self._buffer, self._offset = chunk, 0
+                return True
+        return False
+    
+    def readinto(self, b) -> int:
+        if self._offset >= len(self._buffer) and not self._next_chunk():
+            return 0
+        n = min(len(b), len(self._buffer) - self._offset)
+        b[:n] = self._buffer[self._offset:self._offset + n]
+        self._offset += n
+        return n
+    
+    def drain(self) -> None:
+        """Hash whatever the consumer left unread (e.g. tar padding after the end marker)."""
+        while self._next_chunk():
+            pass
+    
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
 
 
 class Brewery:
@@ -200,6 +468,10 @@ class Brewery:
         self.verbose = verbose
         self.no_auto_update = no_auto_update
         
+        # Shared HTTP session, built on first use (see the session property)
+        self._session = None
+        self._session_lock = threading.Lock()
+        
         for folder in [CELLAR, BIN_DIR, CACHE_DIR]:
             folder.mkdir(parents=True, exist_ok=True)
         
@@ -209,14 +481,20 @@ class Brewery:
         # Initialize metadata cache
         self.metadata_cache = MetadataCache(CACHE_DB)
         
+        # Installed packages live in SQLite; migrate the legacy JSON file on first run
+        self.inventory_store = InventoryStore(INVENTORY_DB)
         if INVENTORY_FILE.exists():
-            try:
-                with open(INVENTORY_FILE, 'r') as f:
-                    self.inventory = json.load(f)
-            except json.JSONDecodeError:
-                self.inventory = {}
-        else:
-            self.inventory = {}
+            self.inventory_store.import_json(INVENTORY_FILE)
+        self.inventory = self.inventory_store.load()
+        
+        # Formula metadata cache (in-memory for session, backed by metadata_cache)
+        self._api_cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Whole formula index, keyed by name (loaded lazily for multi-package operations)
+        self._bulk_index: Optional[Dict[str, Dict[str, Any]]] = None
+        
+        # Guards BIN_DIR while install workers link binaries
+        self._bin_lock = threading.Lock()
         
         # Dependency resolution cache (in-memory for session)
         self._dep_resolution_cache: Dict[str, Dict[str, Any]] = {}
@@ -225,6 +503,42 @@ class Brewery:
         if not self.no_auto_update and self.config.get('auto_update', True):
             self._check_self_update()
     
+    @property
+    def session(self):
+        """Shared HTTP session, built on first use so offline commands never import requests."""
+        # Worker threads may be the first users; the lock makes sure they all share one pool
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+    
+    def _build_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        # One session so connections to the API and GHCR are pooled/kept alive
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        # urllib3 retries failed connects and transient 5xx responses for every request
+        retries = Retry(total=RETRY_ATTEMPTS, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        # Metadata lookups are small and numerous, so the API gets a wider pool than GHCR downloads
+        api_adapter = HTTPAdapter(pool_maxsize=MAX_METADATA_WORKERS, max_retries=retries)
+        ghcr_adapter = HTTPAdapter(
+            pool_connections=MAX_PARALLEL_DOWNLOADS,
+            pool_maxsize=MAX_PARALLEL_DOWNLOADS * 2,
+            max_retries=retries
+        )
+        session.mount("https://", HTTPAdapter(max_retries=retries))
+        session.mount("https://formulae.brew.sh", api_adapter)
+        session.mount("https://ghcr.io", ghcr_adapter)
+        # The update check runs at startup of every command; offline it should fail at once, not retry
+        github_adapter = HTTPAdapter(max_retries=Retry(0))
+        session.mount("https://api.github.com", github_adapter)
+        session.mount("https://raw.githubusercontent.com", github_adapter)
+        return session
+    
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration file or create default."""
         default_config = {
@@ -287,7 +601,7 @@ class Brewery:
             repo = self.config.get('github_repo', GITHUB_REPO)
             api_url = f"https://api.github.com/repos/{repo}/releases/latest"
             
-            resp = requests.get(api_url, headers=HEADERS, timeout=5)
+            resp = self.session.get(api_url, timeout=5)
             
             if resp.status_code == 200:
                 release = resp.json()
@@ -318,6 +632,7 @@ class Brewery:
         and overwriting the current installation.
         """
         import re
+        import requests
 
         GITHUB_RAW_URL = "https://raw.githubusercontent.com/SamukeloGift/Brewery/main/main.py"
         
@@ -339,7 +654,7 @@ class Brewery:
             self.console.print("[bold blue]Checking for updates...[/bold blue]")
             
             # 2. Download the latest source code
-            resp = requests.get(GITHUB_RAW_URL, headers=HEADERS, timeout=15)
+            resp = self.session.get(GITHUB_RAW_URL, timeout=15)
             resp.raise_for_status()
             new_content = resp.text
             
@@ -446,12 +761,8 @@ class Brewery:
     
     def upgrade(self):
         """Upgrades all outdated packages."""
-        outdated = []
         with self.console.status("[bold blue]Checking for updates..."):
-            for name, info in self.inventory.items():
-                data = self._get_api_data(name, force_refresh=True)  # Force refresh for upgrades
-                if data and data['versions']['stable'] != info['version']:
-                    outdated.append(name)
+            outdated = [name for name, _, _ in self._find_outdated()]
         
         if not outdated:
             self.console.print("[green]Everything is up to date![/green]")
@@ -469,16 +780,26 @@ class Brewery:
             self.console.print(f"[red]![/red] Bin directory {BIN_DIR} is not in your PATH.")
             issues += 1
             
-        for link in BIN_DIR.iterdir():
-            if link.is_symlink() and not link.exists():
-                self.console.print(f"[red]![/red] Broken symlink found: {link.name}")
-                issues += 1
+        # Every check is an independent stat, and stat releases the GIL, so let them overlap
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            # readdir's file type picks out the symlinks, so only those cost a stat (through the link)
+            with os.scandir(BIN_DIR) as it:
+                links = [entry for entry in it if entry.is_symlink()]
+            broken = executor.map(lambda link: not os.path.exists(link.path), links)
+            packages = list(self.inventory.items())
+            present = executor.map(lambda item: Path(item[1]['path']).exists(), packages)
+            
+            for link, is_broken in zip(links, broken):
+                if is_broken:
+                    self.console.print(f"[red]![/red] Broken symlink found: {link.name}")
+                    issues += 1
 
-        # Check Inventory Consistency
-        for name, info in self.inventory.items():
-            if not Path(info['path']).exists():
-                self.console.print(f"[red]![/red] Inventory says {name} is installed, but folder is missing.")
-                issues += 1
+            # Check Inventory Consistency
+            for (name, _), exists in zip(packages, present):
+                if not exists:
+                    self.console.print(f"[red]![/red] Inventory says {name} is installed, but folder is missing.")
+                    issues += 1
 
         # Cache stats
         cache_stats = self.metadata_cache.stats()
@@ -492,9 +813,11 @@ class Brewery:
     def cache_clear(self):
         """Clear the metadata cache."""
         with self.console.status("[bold yellow]Clearing cache..."):
-            if CACHE_DB.exists():
-                CACHE_DB.unlink()
-                self.metadata_cache = MetadataCache(CACHE_DB)
+            self.metadata_cache.close()
+            CACHE_DB.unlink(missing_ok=True)
+            self.metadata_cache = MetadataCache(CACHE_DB)
+            self._api_cache.clear()
+            self._bulk_index = None
             self.console.print("[green]✓ Cache cleared![/green]")
     
     def cache_stats(self):
@@ -518,58 +841,160 @@ class Brewery:
         if self.verbose:
             self.console.print(f"[dim]DEBUG: {message}[/dim]")
 
-    def _save_inventory(self) -> None:
-        """Save inventory with file locking."""
-        with open(INVENTORY_FILE, 'w') as f:
+    def _save_inventory(self, pkg_name: str) -> None:
+        """Persist a single inventory entry."""
+        self.inventory_store.save(pkg_name, self.inventory[pkg_name])
+
+    def _extract_bottle(self, fileobj, dest: str) -> None:
+        """Extract a gzipped bottle from a non-seekable stream, preferring the system tar."""
+        tar_bin = shutil.which("tar")
+        if not tar_bin:
+            import tarfile
+            # ISA-L inflates several times faster than zlib when the isal package is installed
             try:
-                fcntl.flock(f, fcntl.LOCK_EX)
-                json.dump(self.inventory, f, indent=4)
+                from isal import igzip
+            except ImportError:
+                igzip = None
+            
+            # Large reads mean far fewer inflate calls than tarfile's 10 KiB default
+            if igzip:
+                with igzip.IGzipFile(fileobj=fileobj, mode="rb") as gz:
+                    with tarfile.open(fileobj=gz, mode="r|", bufsize=DOWNLOAD_CHUNK_SIZE) as tar:
+                        tar.extractall(path=dest, filter='data')
+            else:
+                with tarfile.open(fileobj=fileobj, mode="r|gz", bufsize=DOWNLOAD_CHUNK_SIZE) as tar:
+                    tar.extractall(path=dest, filter='data')
+            return
+        
+        # Native tar (fed by pigz when installed) inflates in its own process, off the GIL.
+        # Like filter='data' above, never keep the archive's owner or setuid/world-writable modes.
+        pigz = shutil.which("pigz")
+        extract = [tar_bin, "--no-same-owner", "--no-same-permissions"]
+        with tempfile.TemporaryFile() as errors:
+            if pigz:
+                # Pipe pigz into a plain tar ourselves: --use-compress-program behaves differently
+                # in GNU tar and bsdtar, and bsdtar fails when the program hits a broken pipe
+                inflate = subprocess.Popen([pigz, "-dc"], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                           stderr=subprocess.DEVNULL, bufsize=0)
+                proc = subprocess.Popen([*extract, "-xf", "-", "-C", dest], stdin=inflate.stdout, stderr=errors)
+                # Only tar holds the read end now, so pigz sees the pipe close if tar exits early
+                inflate.stdout.close()
+                sink = inflate.stdin
+            else:
+                inflate = None
+                proc = subprocess.Popen([*extract, "-xzf", "-", "-C", dest], stdin=subprocess.PIPE,
+                                        stderr=errors, bufsize=0)
+                sink = proc.stdin
+            
+            try:
+                shutil.copyfileobj(fileobj, sink, DOWNLOAD_CHUNK_SIZE)
+            except BrokenPipeError:
+                # tar may exit as soon as it reaches the end-of-archive marker; the caller
+                # still drains and hashes the rest of the download
+                pass
             finally:
-                fcntl.flock(f, fcntl.LOCK_UN)
+                # Closing stdin also ends the pipeline when the download itself failed
+                sink.close()
+                if inflate:
+                    inflate.wait()
+                proc.wait()
+            
+            if proc.returncode != 0:
+                errors.seek(0)
+                raise Exception(f"tar failed: {errors.read().decode(errors='replace').strip()}")
 
-    @lru_cache(maxsize=128)
-    def _verify_sha256(self, file_path: str, expected_sha: str) -> bool:
-        """Verify SHA256 with LRU cache for repeated checks."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(65536), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest() == expected_sha
+    def _revalidation_headers(self, cache_key: str, table: str = METADATA_TABLE) -> Tuple[Optional[Tuple[Any, Optional[str], Optional[str]]], Dict[str, str]]:
+        """Return any stale cache entry plus headers to revalidate it, so unchanged data comes back as 304."""
+        stale = self.metadata_cache.get_stale(cache_key, table)
+        headers = {}
+        if stale:
+            _, etag, last_modified = stale
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return stale, headers
+
+    def _load_bulk_index(self, force_refresh: bool = False) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Load the whole formula index in one request instead of one request per package."""
+        if self._bulk_index is not None and not force_refresh:
+            return self._bulk_index
+        
+        import requests
+        # The cache holds the API's formula list verbatim; index it by name on load
+        if not force_refresh:
+            cached = self.metadata_cache.get(BULK_INDEX_KEY, INDEX_TABLE)
+            if cached:
+                self._bulk_index = {formula['name']: formula for formula in cached}
+                return self._bulk_index
+        
+        stale, conditional_headers = self._revalidation_headers(BULK_INDEX_KEY, INDEX_TABLE)
+        try:
+            self.log("Fetching formula index")
+            resp = self.session.get(BULK_INDEX_URL, headers=conditional_headers, timeout=REQUEST_TIMEOUT)
+            if resp.status_code == 304 and stale:
+                self.metadata_cache.touch(BULK_INDEX_KEY, table=INDEX_TABLE)
+                self._bulk_index = {formula['name']: formula for formula in stale[0]}
+                return self._bulk_index
+            resp.raise_for_status()
+            index = {formula['name']: formula for formula in json_loads(resp.content)}
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            # Callers fall back to per-package requests
+            self.log(f"Formula index unavailable: {e}")
+            return None
+        
+        # Store the multi-MB body as received rather than serializing the index again
+        self.metadata_cache.set_raw(
+            BULK_INDEX_KEY, resp.content,
+            etag=resp.headers.get('ETag'),
+            last_modified=resp.headers.get('Last-Modified'),
+            table=INDEX_TABLE
+        )
+        self._bulk_index = index
+        return index
 
     def _get_api_data(self, pkg_name: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
-        """Fetch package metadata with caching and retry logic."""
+        """Fetch package metadata with caching (retries are handled by the session)."""
         # Check cache first unless force refresh
         if not force_refresh:
+            if pkg_name in self._api_cache:
+                return self._api_cache[pkg_name]
+            if self._bulk_index and pkg_name in self._bulk_index:
+                return self._bulk_index[pkg_name]
             cached = self.metadata_cache.get(pkg_name)
             if cached:
                 self.log(f"Cache hit for {pkg_name}")
+                self._api_cache[pkg_name] = cached
                 return cached
         
+        import requests
         url = f"https://formulae.brew.sh/api/formula/{pkg_name}.json"
         
-        for attempt in range(RETRY_ATTEMPTS):
-            try:
-                self.log(f"Fetching metadata for {pkg_name} (attempt {attempt + 1}/{RETRY_ATTEMPTS})")
-                resp = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
-                
-                if resp.status_code == 200:
-                    data = resp.json()
-                    # Cache the successful response
-                    self.metadata_cache.set(pkg_name, data)
-                    return data
-                elif resp.status_code == 404:
-                    return None
-                else:
-                    self.log(f"HTTP {resp.status_code} for {pkg_name}")
-                    
-            except requests.Timeout:
-                self.log(f"Timeout fetching {pkg_name}")
-                if attempt < RETRY_ATTEMPTS - 1:
-                    time.sleep(RETRY_DELAY)
-            except Exception as e:
-                self.log(f"API Error for {pkg_name}: {e}")
-                if attempt < RETRY_ATTEMPTS - 1:
-                    time.sleep(RETRY_DELAY)
+        stale, conditional_headers = self._revalidation_headers(pkg_name)
+        
+        try:
+            self.log(f"Fetching metadata for {pkg_name}")
+            resp = self.session.get(url, headers=conditional_headers, timeout=REQUEST_TIMEOUT)
+            
+            if resp.status_code == 304 and stale:
+                self.log(f"Not modified: {pkg_name}")
+                self.metadata_cache.touch(pkg_name)
+                self._api_cache[pkg_name] = stale[0]
+                return stale[0]
+            elif resp.status_code == 200:
+                data = json_loads(resp.content)
+                # Cache the successful response body as-is, it is already JSON
+                self.metadata_cache.set_raw(
+                    pkg_name, resp.content,
+                    etag=resp.headers.get('ETag'),
+                    last_modified=resp.headers.get('Last-Modified')
+                )
+                self._api_cache[pkg_name] = data
+                return data
+            elif resp.status_code != 404:
+                self.log(f"HTTP {resp.status_code} for {pkg_name}")
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            self.log(f"API Error for {pkg_name}: {e}")
         
         return None
 
@@ -621,36 +1046,46 @@ class Brewery:
         
         self.console.print(table)
 
+    def _find_outdated(self) -> List[Tuple[str, str, str]]:
+        """Fetch fresh metadata for all installed packages in parallel; returns (name, current, latest)."""
+        # Nothing to compare, so don't download the whole index
+        if not self.inventory:
+            return []
+        
+        import concurrent.futures
+        index = self._load_bulk_index(force_refresh=True)
+        
+        def fetch(item):
+            name, info = item
+            if index and name in index:
+                return name, info, index[name]
+            try:
+                return name, info, self._get_api_data(name, force_refresh=True)
+            except Exception as e:
+                self.log(f"Error checking {name}: {e}")
+                return name, info, None
+        
+        outdated = []
+        # Sized to the API connection pool so workers never wait on a free connection
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_METADATA_WORKERS) as executor:
+            for name, info, data in executor.map(fetch, list(self.inventory.items())):
+                if data and data['versions']['stable'] != info['version']:
+                    outdated.append((name, info['version'], data['versions']['stable']))
+        return outdated
+
     def check_outdated(self) -> None:
         table = Table(title="Updates Available", box=box.SIMPLE)
         table.add_column("Package", style="cyan")
         table.add_column("Current", style="red")
         table.add_column("Latest", style="green")
 
-        found: bool = False
-        
-        # Batch fetch metadata with threading for better performance
         with self.console.status("[bold blue]Checking for updates..."):
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                future_to_pkg = {
-                    executor.submit(self._get_api_data, name, True): name 
-                    for name in self.inventory.keys()
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_pkg):
-                    name = future_to_pkg[future]
-                    try:
-                        data = future.result()
-                        if data:
-                            current_ver = self.inventory[name]['version']
-                            latest_ver = data['versions']['stable']
-                            if latest_ver != current_ver:
-                                table.add_row(name, current_ver, latest_ver)
-                                found = True
-                    except Exception as e:
-                        self.log(f"Error checking {name}: {e}")
+            outdated = self._find_outdated()
         
-        if found:
+        for name, current_ver, latest_ver in outdated:
+            table.add_row(name, current_ver, latest_ver)
+        
+        if outdated:
             self.console.print(table)
         else:
             self.console.print("[green]✓ All packages are up to date![/green]")
@@ -665,62 +1100,115 @@ class Brewery:
             tmp_file.unlink()
         
         # Clean old versions
+        stale_folders = []
         for pkg_folder in CELLAR.iterdir():
-            if pkg_folder.is_dir():
+            if pkg_folder.name.startswith(EXTRACT_DIR_PREFIX):
+                # Left behind by an interrupted install, unless its owner is still extracting
+                owner = pkg_folder.name[len(EXTRACT_DIR_PREFIX):].split("-", 1)[0]
+                if not (owner.isdigit() and pid_alive(int(owner))):
+                    stale_folders.append(pkg_folder)
+            elif pkg_folder.is_dir():
                 active_ver = self.inventory.get(pkg_folder.name, {}).get('version')
                 for ver_folder in pkg_folder.iterdir():
                     if ver_folder.is_dir() and ver_folder.name != active_ver:
-                        folder_size = sum(f.stat().st_size for f in ver_folder.rglob('*') if f.is_file())
-                        bytes_saved += folder_size
-                        shutil.rmtree(ver_folder)
+                        stale_folders.append(ver_folder)
+        
+        # Version folders are independent subtrees, so they can be removed concurrently
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            bytes_saved += sum(executor.map(remove_tree, stale_folders))
         
         # Clean expired cache entries
         expired_count = self.metadata_cache.clear_expired()
         self.console.print(f"[green]✓ Cleanup complete! Freed {bytes_saved / (1024*1024):.2f} MB[/green]")
         self.console.print(f"[green]✓ Removed {expired_count} expired cache entries[/green]")
 
-    def _resolve_graph(self, pkg_name: str, parent_name: str, res_map: Dict[str, Dict[str, Any]]):
-        """Resolve dependency graph with session-level caching."""
-        # Check session cache
-        if pkg_name in self._dep_resolution_cache:
-            cached_result = self._dep_resolution_cache[pkg_name]
-            if pkg_name not in res_map:
-                res_map[pkg_name] = cached_result
-                # Recursively add cached dependencies
-                for dep in cached_result.get('dependencies', []):
-                    if dep in self._dep_resolution_cache and dep not in res_map:
-                        res_map[dep] = self._dep_resolution_cache[dep]
-            return
+    def _resolve_graph(self, roots: List[str], res_map: Dict[str, Dict[str, Any]]):
+        """Resolve dependency graph with a worklist, fetching metadata concurrently."""
+        import concurrent.futures
+        # With the formula index loaded, most lookups below never touch the network
+        self._load_bulk_index()
         
-        data = self._get_api_data(pkg_name)
-        if not data:
-            raise Exception(f"Metadata missing for: {pkg_name}")
-
-        current_ver: str = data['versions']['stable']
-        if pkg_name in res_map:
-            return
-
-        result = {
-            "version": current_ver, 
-            "requested_by": parent_name,
-            "dependencies": data.get('dependencies', [])
-        }
+        pending = deque((name, "User Request") for name in roots)
+        seen = set()
+        in_flight: Dict[concurrent.futures.Future, Tuple[str, str]] = {}
         
-        res_map[pkg_name] = result
-        self._dep_resolution_cache[pkg_name] = result
+        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_METADATA_WORKERS) as executor:
+            while pending or in_flight:
+                while pending:
+                    pkg_name, parent_name = pending.popleft()
+                    if pkg_name in seen or pkg_name in res_map:
+                        continue
+                    seen.add(pkg_name)
+                    # Check session cache
+                    if pkg_name in self._dep_resolution_cache:
+                        cached_result = self._dep_resolution_cache[pkg_name]
+                        res_map[pkg_name] = cached_result
+                        pending.extend((dep, pkg_name) for dep in cached_result.get('dependencies', []))
+                        continue
+                    in_flight[executor.submit(self._get_api_data, pkg_name)] = (pkg_name, parent_name)
+                
+                if not in_flight:
+                    break
+                
+                # Handle whichever fetches land first, so their dependencies start right away
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    pkg_name, parent_name = in_flight.pop(future)
+                    data = future.result()
+                    if not data:
+                        raise Exception(f"Metadata missing for: {pkg_name}")
+                    
+                    result = {
+                        "version": data['versions']['stable'], 
+                        "requested_by": parent_name,
+                        "dependencies": data.get('dependencies', [])
+                    }
+                    
+                    res_map[pkg_name] = result
+                    self._dep_resolution_cache[pkg_name] = result
+                    pending.extend((dep, pkg_name) for dep in result['dependencies'])
         
-        for dep in data.get('dependencies', []):
-            self._resolve_graph(dep, pkg_name, res_map)
+        # Fetches land in arbitrary order; hand callers the map dependencies-first
+        ordered = {name: res_map[name] for name in dependency_order(res_map)}
+        res_map.clear()
+        res_map.update(ordered)
+
+    def _cached_resolution(self, resolution_key: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Return a saved dependency graph, but only while it matches the current formula index."""
+        cached = self.metadata_cache.get_resolution(resolution_key)
+        if cached is None:
+            return None
+        
+        # Workers install from the index, so a graph built from older metadata would
+        # pair old version numbers with new bottles
+        index = self._load_bulk_index()
+        if not index:
+            return None
+        for name, entry in cached.items():
+            formula = index.get(name)
+            if (not formula or formula['versions']['stable'] != entry['version']
+                    or formula.get('dependencies', []) != entry['dependencies']):
+                self.log(f"Saved resolution is out of date ({name})")
+                return None
+        return cached
 
     def install(self, pkg_names: List[str], force: bool = False) -> None:
-        resolution_map = {}
-        with self.console.status("[bold blue]Resolving dependencies..."):
-            try:
-                for pkg in pkg_names:
-                    self._resolve_graph(pkg, "User Request", resolution_map)
-            except Exception as e:
-                self.console.print(f"[bold red]Resolution Error:[/bold red] {e}")
-                return
+        import concurrent.futures
+        from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TransferSpeedColumn
+        
+        # Reuse the graph from an earlier run for the same packages (e.g. retrying a failed install)
+        resolution_key = ",".join(sorted(set(pkg_names)))
+        resolution_map = self._cached_resolution(resolution_key)
+        if resolution_map is None:
+            resolution_map = {}
+            with self.console.status("[bold blue]Resolving dependencies..."):
+                try:
+                    self._resolve_graph(pkg_names, resolution_map)
+                except Exception as e:
+                    self.console.print(f"[bold red]Resolution Error:[/bold red] {e}")
+                    return
+            self.metadata_cache.set_resolution(resolution_key, resolution_map)
 
         if force:
             to_fetch = resolution_map
@@ -731,12 +1219,18 @@ class Brewery:
             self.console.print("[green]- All requested packages are already installed. Use --force to reinstall.[/green]")
             return
 
+        # Fetch all GHCR tokens up front so they are off each download's critical path
+        with self.console.status("[bold blue]Authenticating with GHCR..."):
+            with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOWNLOADS) as executor:
+                tokens = dict(zip(to_fetch, executor.map(self._fetch_ghcr_token, to_fetch)))
+
         progress = Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             DownloadColumn(),
             TransferSpeedColumn(),
+            refresh_per_second=10,
         )
 
         with progress:
@@ -748,6 +1242,7 @@ class Brewery:
                         self._download_and_extract_worker, 
                         name, 
                         details['version'], 
+                        tokens[name],
                         task_id, 
                         progress
                     ))
@@ -762,73 +1257,113 @@ class Brewery:
                                 "path": str(pkg_dir), 
                                 "symlinks": bin_links
                             }
-                            self._save_inventory()
+                            self._save_inventory(pkg)
                     except Exception as e:
                         self.console.print(f"[red]Error during install:[/red] {e}")
 
-    def _download_and_extract_worker(self, pkg: str, version: str, task_id, progress):
+    def _fetch_ghcr_token(self, pkg: str) -> Optional[str]:
+        """Fetch an anonymous pull token for a package's bottle on GHCR."""
+        token_url = f"https://ghcr.io/token?service=ghcr.io&scope=repository:homebrew/core/{pkg}:pull"
+        try:
+            token_resp = self.session.get(token_url, timeout=REQUEST_TIMEOUT)
+            return token_resp.json().get('token')
+        except Exception as e:
+            self.log(f"Token fetch failed for {pkg}: {e}")
+            return None
+
+    def _download_and_extract_worker(self, pkg: str, version: str, token: Optional[str], task_id, progress):
         """Download and extract with improved error handling and verification."""
+        import requests
+        from urllib3.exceptions import ProtocolError, ReadTimeoutError
+        
         try:
             data = self._get_api_data(pkg)
             if not data:
                 progress.update(task_id, description=f"[red]Metadata not found for {pkg}[/red]")
                 return None
                 
-            bottle = data['bottle']['stable']['files'].get(OS_FLAVOR)
+            # The bottle on offer is always the current stable one; never file it under another version
+            if data['versions']['stable'] != version:
+                progress.update(task_id, description=f"[red]{pkg} is now {data['versions']['stable']}, expected {version}[/red]")
+                raise Exception(f"Metadata for {pkg} changed to {data['versions']['stable']} since resolution, expected {version}")
+            
+            flavor = OS_FLAVOR
+            bottle = data['bottle']['stable']['files'].get(flavor)
             if not bottle:
-                progress.update(task_id, description=f"[yellow]No bottle for {OS_FLAVOR}, skipping {pkg}[/yellow]")
+                progress.update(task_id, description=f"[yellow]No bottle for {flavor}, skipping {pkg}[/yellow]")
                 return None
+            if not token:
+                token = self._fetch_ghcr_token(pkg)
+            headers = {'Authorization': f'Bearer {token}'}
 
-            # Auth with GHCR
-            token_url = f"https://ghcr.io/token?service=ghcr.io&scope=repository:homebrew/core/{pkg}:pull"
-            token_resp = requests.get(token_url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
-            token = token_resp.json().get('token')
-            
-            tmp_file = BASE_DIR / f"{pkg}_{version}.tar.gz"
-            
-            # Download with retry logic
-            for attempt in range(RETRY_ATTEMPTS):
-                try:
-                    with requests.get(
-                        bottle['url'], 
-                        headers={'Authorization': f'Bearer {token}'}, 
-                        stream=True,
-                        timeout=REQUEST_TIMEOUT
-                    ) as r:
-                        r.raise_for_status()
-                        total_size = int(r.headers.get('content-length', 0))
-                        progress.update(task_id, total=total_size)
-                        
-                        with open(tmp_file, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                f.write(chunk)
-                                progress.update(task_id, advance=len(chunk))
-                        break
-                except requests.RequestException as e:
-                    if attempt < RETRY_ATTEMPTS - 1:
-                        progress.update(task_id, description=f"[yellow]Retry {attempt + 1} for {pkg}[/yellow]")
-                        time.sleep(RETRY_DELAY)
-                    else:
-                        raise
-
-            progress.update(task_id, description=f"[blue]Verifying {pkg}...[/blue]")
-            if not self._verify_sha256(str(tmp_file), bottle['sha256']):
-                progress.update(task_id, description=f"[red]SHA mismatch {pkg}[/red]")
-                tmp_file.unlink()
-                raise Exception(f"SHA256 mismatch for {pkg}")
-
-            progress.update(task_id, description=f"[blue]Extracting {pkg}...[/blue]")
             final_pkg_dir = CELLAR / pkg / version
-            if final_pkg_dir.exists():
-                shutil.rmtree(final_pkg_dir)
-            final_pkg_dir.mkdir(parents=True, exist_ok=True)
             
-            # Extract to temp first to handle nesting issues
-            with tempfile.TemporaryDirectory() as temp_extract_dir:
-                with tarfile.open(tmp_file, "r:gz") as tar:
-                    tar.extractall(path=temp_extract_dir, filter='data')
+            # Extract to temp first to handle nesting issues. It lives inside the Cellar so
+            # the finished tree can be renamed into place instead of copied across filesystems.
+            # The PID in the name lets a concurrent cleanup tell a live extraction from a leftover
+            with tempfile.TemporaryDirectory(dir=CELLAR, prefix=f"{EXTRACT_DIR_PREFIX}{os.getpid()}-") as temp_dir:
+                extracted_root = Path(temp_dir) / "root"
+                extracted_root.mkdir()
+                
+                # Download with retry logic
+                attempt = 0
+                token_refreshed = False
+                while True:
+                    try:
+                        with self.session.get(
+                            bottle['url'], 
+                            headers=headers, 
+                            stream=True,
+                            timeout=REQUEST_TIMEOUT
+                        ) as r:
+                            if r.status_code == 401 and not token_refreshed:
+                                # Tokens are short-lived and this one was fetched before the batch
+                                # started; a fresh one doesn't use up a retry
+                                token_refreshed = True
+                                headers = {'Authorization': f'Bearer {self._fetch_ghcr_token(pkg)}'}
+                                continue
+                            r.raise_for_status()
+                            r.raw.decode_content = True
+                            total_size = int(r.headers.get('content-length', 0))
+                            progress.update(task_id, total=total_size, completed=0)
+                            
+                            # Batch progress updates, each one takes Rich's lock
+                            unreported = 0
+                            def report(n: int) -> None:
+                                nonlocal unreported
+                                unreported += n
+                                if unreported >= PROGRESS_UPDATE_BYTES:
+                                    progress.update(task_id, advance=unreported)
+                                    unreported = 0
+                            
+                            # Hash and extract 1 MiB socket reads as they arrive, the tarball never touches the disk
+                            chunks = iter(partial(r.raw.read, DOWNLOAD_CHUNK_SIZE), b"")
+                            stream = HashingStream(chunks, on_read=report)
+                            self._extract_bottle(stream, str(extracted_root))
+                            stream.drain()
+                            progress.update(task_id, advance=unreported)
+                        break
+                    except (requests.RequestException, ProtocolError, ReadTimeoutError) as e:
+                        # Throw away the partial extraction before trying again
+                        shutil.rmtree(extracted_root)
+                        extracted_root.mkdir()
+                        attempt += 1
+                        if attempt < RETRY_ATTEMPTS:
+                            progress.update(task_id, description=f"[yellow]Retry {attempt} for {pkg}[/yellow]")
+                            time.sleep(RETRY_DELAY)
+                        else:
+                            raise
+                
+                # Nothing leaves the temp dir until the whole stream has been verified
+                progress.update(task_id, description=f"[blue]Verifying {pkg}...[/blue]")
+                if stream.hexdigest() != bottle['sha256']:
+                    progress.update(task_id, description=f"[red]SHA mismatch {pkg}[/red]")
+                    raise Exception(f"SHA256 mismatch for {pkg}")
+                
+                if final_pkg_dir.exists():
+                    shutil.rmtree(final_pkg_dir)
+                final_pkg_dir.parent.mkdir(parents=True, exist_ok=True)
                 
-                extracted_root = Path(temp_extract_dir)
                 if (extracted_root / pkg / version).exists():
                     source_dir = extracted_root / pkg / version
                 elif (extracted_root / pkg).exists():
@@ -836,25 +1371,36 @@ class Brewery:
                 else:
                     source_dir = extracted_root
                 
-                for item in source_dir.iterdir():
-                    shutil.move(str(item), str(final_pkg_dir))
-
-            tmp_file.unlink()
+                os.rename(source_dir, final_pkg_dir)
 
             # Link binaries
             bin_links = []
-            for bin_folder_name in ["bin", "sbin"]:
-                bin_path = final_pkg_dir / bin_folder_name
-                if bin_path.exists():
-                    for exe in bin_path.iterdir():
-                        if exe.is_file():
-                            exe.chmod(exe.stat().st_mode | 0o111)
-                            
-                            link_dest = BIN_DIR / exe.name
-                            if link_dest.exists() or link_dest.is_symlink():
-                                link_dest.unlink()
-                            link_dest.symlink_to(exe)
-                            bin_links.append(str(link_dest))
+            # Serialize linking so parallel workers don't race on the same names
+            with self._bin_lock:
+                for bin_folder_name in ["bin", "sbin"]:
+                    try:
+                        # scandir hands back the file type from readdir, no extra stat per entry
+                        entries = os.scandir(final_pkg_dir / bin_folder_name)
+                    except FileNotFoundError:
+                        continue
+                    with entries:
+                        for entry in entries:
+                            if entry.is_file():
+                                mode = entry.stat().st_mode
+                                if mode & 0o111 != 0o111:
+                                    os.chmod(entry.path, mode | 0o111)
+                                
+                                # Build the link under a private name and rename it over the old one,
+                                # so the command never disappears and a stale link is replaced atomically
+                                link_dest = BIN_DIR / entry.name
+                                tmp_link = BIN_DIR / f".{entry.name}.{os.getpid()}.tmp"
+                                try:
+                                    os.symlink(entry.path, tmp_link)
+                                except FileExistsError:
+                                    os.unlink(tmp_link)
+                                    os.symlink(entry.path, tmp_link)
+                                os.replace(tmp_link, link_dest)
+                                bin_links.append(str(link_dest))
             
             progress.update(task_id, description=f"[green]✓ Installed {pkg}[/green]")
             return pkg, version, final_pkg_dir, bin_links
@@ -886,9 +1432,10 @@ class Brewery:
                 
                 # Invalidate cache for uninstalled package
                 self.metadata_cache.invalidate(pkg_name)
+                self._api_cache.pop(pkg_name, None)
                 
                 del self.inventory[pkg_name]
-                self._save_inventory()
+                self.inventory_store.remove(pkg_name)
                 self.console.print(f"[green]✓ Uninstalled {pkg_name}[/green]")
 
 